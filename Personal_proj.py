@@ -2,7 +2,9 @@ import yfinance as yf
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
+import time
 from datetime import datetime, timedelta
+from pathlib import Path
 
 try:
     import streamlit as st
@@ -20,26 +22,91 @@ INDICES = {
     "Russell 2000": "^RUT"
 }
 
-def get_historical_data(ticker, start_date):
-    """Fetch historical data for a given ticker"""
-    stock = yf.Ticker(ticker)
-    hist = stock.history(start=start_date)
-    return hist
+# On-disk history cache, refreshed once a day
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+CACHE_TTL_DAYS = 1
 
+# Downloaded histories keyed by (tickers, start_date)
+_HIST = {}
+
+def cache_data(func):
+    """Memoize a function across Streamlit reruns when running under Streamlit"""
+    if USING_STREAMLIT:
+        return st.cache_data(ttl=3600, show_spinner=False)(func)
+    return func
+
+def _cached_history(ticker, start_date, ttl_days=CACHE_TTL_DAYS):
+    """Load a ticker's history from the on-disk cache if it is still fresh"""
+    path = CACHE_DIR / f"{ticker}.parquet"
+    if not path.exists() or time.time() - path.stat().st_mtime >= ttl_days * 86400:
+        return None
+    hist = pd.read_parquet(path, engine='pyarrow')
+    hist = hist[hist.index >= pd.Timestamp(start_date, tz=hist.index.tz)]
+    return hist if not hist.empty else None
+
+def get_all_histories(tickers, start_date):
+    """Fetch historical data for several tickers in a single request"""
+    tickers = tuple(tickers)
+    if (tickers, start_date) in _HIST:
+        return _HIST[(tickers, start_date)]
+    histories = {ticker: _cached_history(ticker, start_date) for ticker in tickers}
+    missing = [ticker for ticker, hist in histories.items() if hist is None]
+    if missing:
+        data = yf.download(" ".join(missing), start=start_date, group_by='ticker',
+                           auto_adjust=True, threads=True, progress=False)
+        CACHE_DIR.mkdir(exist_ok=True)
+        failed = []
+        for ticker in missing:
+            if ticker not in data.columns.get_level_values(0) or data[ticker].dropna(how='all').empty:
+                # yfinance reports failed tickers as all-NaN columns rather than raising
+                failed.append(ticker)
+                continue
+            histories[ticker] = data[ticker].dropna(how='all')
+            histories[ticker].to_parquet(CACHE_DIR / f"{ticker}.parquet",
+                                         engine='pyarrow', compression='snappy')
+        if failed:
+            raise ValueError(f"No historical data downloaded for {', '.join(failed)}")
+    _HIST[(tickers, start_date)] = histories
+    return histories
+
+@cache_data
+def get_all_historical_data(start_date):
+    """Fetch historical data for every index"""
+    histories = get_all_histories(INDICES.values(), start_date)
+    return {index_name: histories[ticker] for index_name, ticker in INDICES.items()}
+
+@cache_data
 def calculate_metrics(hist_data):
     """Calculate key investment metrics"""
-    annual_returns = hist_data['Close'].resample('Y').last().pct_change()
+    close = hist_data['Close'].to_numpy()
+    # Last close of each calendar year, including the current partial year
+    years = hist_data.index.year.to_numpy()
+    year_ends = np.r_[np.flatnonzero(np.diff(years) != 0), len(close) - 1]
+    yearly_close = close[year_ends]
+    annual_returns = np.diff(yearly_close) / yearly_close[:-1]
+    # Largest decline from the running peak
+    peak = np.maximum.accumulate(close)
     metrics = {
         'avg_annual_return': annual_returns.mean(),
-        'volatility': annual_returns.std(),
-        'max_drawdown': (hist_data['Close'].min() - hist_data['Close'].max()) / hist_data['Close'].max(),
-        'current_price': hist_data['Close'][-1]
+        'volatility': annual_returns.std(ddof=1),
+        'max_drawdown': float((close / peak - 1.0).min()),
+        'current_price': close[-1]
     }
     return metrics
 
+def get_index_scores(index_metrics, years):
+    """Score every index at once based on the goal timeframe"""
+    m = np.array([[metrics['avg_annual_return'], metrics['volatility'], metrics['max_drawdown']]
+                  for metrics in index_metrics.values()])
+    return (
+        m[:, 0] * 0.4 +
+        (1 / np.abs(m[:, 1])) * 0.3 +
+        (1 / np.abs(m[:, 2])) * 0.3
+    ) * (1 if years > 10 else 0.8)  # Penalty for shorter timeframes
+
 def calculate_investment_needs(goal_amount, years, annual_return):
-    """Calculate required periodic investments"""
-    r = annual_return
+    """Calculate required periodic investments for one or more annual returns"""
+    r = np.asarray(annual_return, dtype=np.float64)
     n_years = years
     
     # Calculate yearly investment needed
@@ -54,6 +121,9 @@ def calculate_investment_needs(goal_amount, years, annual_return):
     }
 
 def run_streamlit_app():
+    today = datetime.now().date()
+    hist_start = today - timedelta(days=365*10)
+
     # Main app
     st.title("🎯 Investment Goal Planner")
 
@@ -63,30 +133,19 @@ def run_streamlit_app():
     with col1:
         goal_amount = st.number_input("Enter your savings goal ($)", min_value=1000, value=100000)
         goal_date = st.date_input("Target date to reach goal", 
-                                min_value=datetime.now().date() + timedelta(days=365),
-                                value=datetime.now().date() + timedelta(days=365*5))
+                                min_value=today + timedelta(days=365),
+                                value=today + timedelta(days=365*5))
 
     # Calculate time frame
-    years_to_goal = (goal_date - datetime.now().date()).days / 365.25
+    years_to_goal = (goal_date - today).days / 365.25
 
     # Fetch and analyze historical data
-    index_metrics = {}
-    for index_name, ticker in INDICES.items():
-        hist_data = get_historical_data(ticker, start_date=datetime.now().date() - timedelta(days=365*10))
-        index_metrics[index_name] = calculate_metrics(hist_data)
+    histories = get_all_historical_data(start_date=hist_start)
+    index_metrics = {index_name: calculate_metrics(hist_data) for index_name, hist_data in histories.items()}
 
     # Find best suited index based on goal timeframe and amount
-    def get_index_score(metrics, years):
-        return (
-            metrics['avg_annual_return'] * 0.4 +
-            (1 / abs(metrics['volatility'])) * 0.3 +
-            (1 / abs(metrics['max_drawdown'])) * 0.3
-        ) * (1 if years > 10 else 0.8)  # Penalty for shorter timeframes
-
-    index_scores = {name: get_index_score(metrics, years_to_goal) 
-                    for name, metrics in index_metrics.items()}
-
-    recommended_index = max(index_scores, key=index_scores.get)
+    index_scores = get_index_scores(index_metrics, years_to_goal)
+    recommended_index = list(index_metrics)[index_scores.argmax()]
 
     # Display recommendations
     st.header("📊 Investment Recommendations")
@@ -98,11 +157,13 @@ def run_streamlit_app():
         st.write(f"Based on your goals and timeframe, we recommend investing in the **{recommended_index}**")
         
         metrics = index_metrics[recommended_index]
-        investment_needs = calculate_investment_needs(
+        all_needs = calculate_investment_needs(
             goal_amount, 
             years_to_goal, 
-            metrics['avg_annual_return']
+            [m['avg_annual_return'] for m in index_metrics.values()]
         )
+        position = list(index_metrics).index(recommended_index)
+        investment_needs = {period: amounts[position] for period, amounts in all_needs.items()}
         
         st.subheader("Required Investment Amounts")
         st.write(f"To reach your goal of **${goal_amount:,.2f}** by **{goal_date}**, you should invest:")
@@ -110,6 +171,9 @@ def run_streamlit_app():
         st.write(f"🔹 ${investment_needs['monthly']:,.2f} monthly")
         st.write(f"🔹 ${investment_needs['weekly']:,.2f} weekly")
 
+        st.subheader("Comparison Across Indices")
+        st.dataframe(pd.DataFrame(all_needs, index=list(index_metrics)).style.format("${:,.2f}"))
+
     with col2:
         st.subheader("Key Metrics")
         st.write(f"Average Annual Return: {metrics['avg_annual_return']*100:.1f}%")
@@ -122,12 +186,17 @@ def run_streamlit_app():
     # Plot historical data for all indices
     fig = go.Figure()
 
-    for index_name, ticker in INDICES.items():
-        hist_data = get_historical_data(ticker, start_date=datetime.now().date() - timedelta(days=365*10))
-        normalized_price = hist_data['Close'] / hist_data['Close'].iloc[0] * 100
+    # One date x index matrix of closes, normalized to the first row in a single pass
+    close_df = pd.concat({index_name: hist_data['Close'] for index_name, hist_data in histories.items()},
+                         axis=1).ffill().dropna()
+    normalized = close_df.to_numpy(dtype=np.float64, copy=True)
+    normalized /= normalized[0]
+    normalized *= 100
+
+    for i, index_name in enumerate(close_df.columns):
         fig.add_trace(go.Scatter(
-            x=hist_data.index,
-            y=normalized_price,
+            x=close_df.index,
+            y=normalized[:, i],
             name=index_name,
             mode='lines'
         ))
@@ -163,6 +232,9 @@ def run_streamlit_app():
         """)
 
 def run_cli_app():
+    today = datetime.now().date()
+    hist_start = today - timedelta(days=365*10)
+
     print("\n🎯 Investment Goal Planner\n")
     
     # Get user inputs
@@ -171,7 +243,7 @@ def run_cli_app():
         try:
             target_date_str = input("Enter target date (YYYY-MM-DD): ")
             goal_date = datetime.strptime(target_date_str, "%Y-%m-%d").date()
-            if goal_date <= datetime.now().date() + timedelta(days=365):
+            if goal_date <= today + timedelta(days=365):
                 print("Please enter a date at least 1 year in the future.")
                 continue
             break
@@ -179,36 +251,27 @@ def run_cli_app():
             print("Invalid date format. Please use YYYY-MM-DD format.")
     
     # Calculate time frame
-    years_to_goal = (goal_date - datetime.now().date()).days / 365.25
+    years_to_goal = (goal_date - today).days / 365.25
     
     print("\nAnalyzing market data...")
     
     # Fetch and analyze historical data
-    index_metrics = {}
-    for index_name, ticker in INDICES.items():
-        hist_data = get_historical_data(ticker, start_date=datetime.now().date() - timedelta(days=365*10))
-        index_metrics[index_name] = calculate_metrics(hist_data)
+    histories = get_all_historical_data(start_date=hist_start)
+    index_metrics = {index_name: calculate_metrics(hist_data) for index_name, hist_data in histories.items()}
     
     # Find best suited index
-    def get_index_score(metrics, years):
-        return (
-            metrics['avg_annual_return'] * 0.4 +
-            (1 / abs(metrics['volatility'])) * 0.3 +
-            (1 / abs(metrics['max_drawdown'])) * 0.3
-        ) * (1 if years > 10 else 0.8)
-    
-    index_scores = {name: get_index_score(metrics, years_to_goal) 
-                    for name, metrics in index_metrics.items()}
-    
-    recommended_index = max(index_scores, key=index_scores.get)
+    index_scores = get_index_scores(index_metrics, years_to_goal)
+    recommended_index = list(index_metrics)[index_scores.argmax()]
     metrics = index_metrics[recommended_index]
     
     # Calculate investment needs
-    investment_needs = calculate_investment_needs(
+    all_needs = calculate_investment_needs(
         goal_amount,
         years_to_goal,
-        metrics['avg_annual_return']
+        [m['avg_annual_return'] for m in index_metrics.values()]
     )
+    position = list(index_metrics).index(recommended_index)
+    investment_needs = {period: amounts[position] for period, amounts in all_needs.items()}
     
     # Display results
     print("\n📊 Investment Recommendations\n")
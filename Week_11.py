@@ -1,8 +1,47 @@
 import yfinance as yf
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import datetime
+import numpy as np
+from numba import njit
+
+@njit(cache=True)
+def rolling_corr(x, y, w):
+    """Rolling Pearson correlation of x and y over a window of w samples.
+
+    Like pandas' rolling().corr(), a window yields NaN unless all w pairs are
+    finite and neither series is constant within it.
+    """
+    n = x.size
+    out = np.full(n, np.nan)
+    count = 0
+    sx = sy = sxy = sxx = syy = 0.0
+    for i in range(n):
+        # Add the entering sample
+        if np.isfinite(x[i]) and np.isfinite(y[i]):
+            count += 1
+            sx += x[i]
+            sy += y[i]
+            sxy += x[i] * y[i]
+            sxx += x[i] * x[i]
+            syy += y[i] * y[i]
+        if i >= w:
+            # Drop the sample leaving the window
+            j = i - w
+            if np.isfinite(x[j]) and np.isfinite(y[j]):
+                count -= 1
+                sx -= x[j]
+                sy -= y[j]
+                sxy -= x[j] * y[j]
+                sxx -= x[j] * x[j]
+                syy -= y[j] * y[j]
+        if count == w:
+            var_x = w * sxx - sx * sx
+            var_y = w * syy - sy * sy
+            # Treat variance lost to rounding in the running sums as zero
+            if var_x > 1e-12 * w * sxx and var_y > 1e-12 * w * syy:
+                out[i] = (w * sxy - sx * sy) / np.sqrt(var_x * var_y)
+    return out
 
 # User input for crypto and stock
 crypto_symbol = input("Enter crypto symbol (e.g., BTC-USD): ")
@@ -16,33 +55,31 @@ end_date = datetime.datetime.today().strftime('%Y-%m-%d')
 crypto = yf.download(crypto_symbol, start=start_date, end=end_date)
 stock = yf.download(stock_symbol, start=start_date, end=end_date)
 
-# Rename columns to distinguish
-crypto = crypto[['Close']].rename(columns={'Close': 'Crypto_Close'})
-stock = stock[['Close']].rename(columns={'Close': 'Stock_Close'})
+# Align closing prices on the dates both series traded (squeeze drops yfinance's ticker column level)
+crypto_close, stock_close = crypto['Close'].squeeze().align(stock['Close'].squeeze(), join='inner')
+dates = crypto_close.index
+crypto_close = crypto_close.to_numpy(dtype=np.float64)
+stock_close = stock_close.to_numpy(dtype=np.float64)
 
-# Merge data
-df = pd.merge(crypto, stock, left_index=True, right_index=True, how='inner')
+# Drop dates where either close is missing
+valid = np.isfinite(crypto_close) & np.isfinite(stock_close)
+dates, crypto_close, stock_close = dates[valid], crypto_close[valid], stock_close[valid]
 
 # Calculate daily returns
-df['Crypto_Return'] = df['Crypto_Close'].pct_change()
-df['Stock_Return'] = df['Stock_Close'].pct_change()
-
-# Drop NaN rows
-df.dropna(inplace=True)
+return_dates = dates[1:]
+crypto_returns = np.diff(crypto_close) / crypto_close[:-1]
+stock_returns = np.diff(stock_close) / stock_close[:-1]
 
 # Calculate correlation
-correlation = df['Crypto_Return'].corr(df['Stock_Return'])
+correlation = np.corrcoef(crypto_returns, stock_returns)[0, 1]
 
 # Print correlation
 print(f"\nCorrelation between {crypto_symbol} and {stock_symbol} daily returns: {correlation:.4f}")
 
 # Plot normalized prices
-df['Crypto_Normalized'] = df['Crypto_Close'] / df['Crypto_Close'].iloc[0]
-df['Stock_Normalized'] = df['Stock_Close'] / df['Stock_Close'].iloc[0]
-
 plt.figure(figsize=(12,6))
-plt.plot(df.index, df['Crypto_Normalized'], label=crypto_symbol)
-plt.plot(df.index, df['Stock_Normalized'], label=stock_symbol)
+plt.plot(dates, crypto_close / crypto_close[0], label=crypto_symbol)
+plt.plot(dates, stock_close / stock_close[0], label=stock_symbol)
 plt.title(f"{crypto_symbol} vs {stock_symbol} Performance Since {start_date}")
 plt.xlabel("Date")
 plt.ylabel("Normalized Price")
@@ -53,7 +90,7 @@ plt.show()
 
 # Plot return correlation scatter
 plt.figure(figsize=(8,6))
-sns.scatterplot(x='Stock_Return', y='Crypto_Return', data=df, alpha=0.5)
+sns.scatterplot(x=stock_returns, y=crypto_returns, alpha=0.5)
 plt.title(f"Daily Return Correlation: {crypto_symbol} vs {stock_symbol}")
 plt.xlabel(f"{stock_symbol} Daily Return")
 plt.ylabel(f"{crypto_symbol} Daily Return")
@@ -62,10 +99,10 @@ plt.tight_layout()
 plt.show()
 
 # Optional: Rolling correlation
-df['Rolling_Correlation'] = df['Crypto_Return'].rolling(window=30).corr(df['Stock_Return'])
+rolling_correlation = rolling_corr(crypto_returns, stock_returns, 30)
 
 plt.figure(figsize=(12,6))
-plt.plot(df.index, df['Rolling_Correlation'], label='30-Day Rolling Correlation', color='purple')
+plt.plot(return_dates, rolling_correlation, label='30-Day Rolling Correlation', color='purple')
 plt.title(f"30-Day Rolling Correlation: {crypto_symbol} vs {stock_symbol}")
 plt.xlabel("Date")
 plt.ylabel("Correlation")
@@ -12,19 +12,17 @@ INDICES = {
 
 # Download 10 years of data for each index
 start_date = datetime.now().date() - timedelta(days=365*10)
-all_data = {}
 
 print("Downloading market data...")
-for index_name, ticker in INDICES.items():
-    print(f"Fetching {index_name} data...")
-    hist_data = yf.Ticker(ticker).history(start=start_date)
-    all_data[index_name] = hist_data
+data = yf.download(" ".join(INDICES.values()), start=start_date, group_by='ticker',
+                   auto_adjust=True, actions=True, threads=True, progress=False)
+all_data = {index_name: data[ticker].dropna(how='all') for index_name, ticker in INDICES.items()}
 
-# Save to CSV files
+# Save to Parquet files
 print("\nSaving data to files...")
 for index_name, data in all_data.items():
-    filename = f"market_data_{index_name.lower().replace(' ', '_').replace('&', 'and')}.csv"
-    data.to_csv(filename)
+    filename = f"market_data_{index_name.lower().replace(' ', '_').replace('&', 'and')}.parquet"
+    data.to_parquet(filename, engine='pyarrow', compression='snappy')
     print(f"Saved {filename}")
 
-print("\nDone! You can now use these CSV files with the investment planner.")
+print("\nDone! Market data saved as Parquet files.")
@@ -1,21 +1,24 @@
 import streamlit as st
 import yfinance as yf
 import pandas as pd
-import requests
+import httpx
+import asyncio
 import datetime
 import plotly.express as px
 import numpy as np
-from sklearn.linear_model import LinearRegression
-import seaborn as sns
-import matplotlib.pyplot as plt
+from numba import njit
 import logging
 import os
 import sys
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
+# Trading days per year, for annualizing daily volatility
+SQRT252 = np.float64(np.sqrt(252))
+
 def run_streamlit():
     """Launch the Streamlit app using the current script."""
     current_script = os.path.abspath(__file__)
@@ -35,189 +38,272 @@ def is_streamlit_running():
 # Utility Functions
 # -------------------------------------------
 
-def fetch_crypto_data(crypto_id, days='90'):
+class CryptoFetchError(Exception):
+    """Raised when some cryptocurrencies could not be fetched, carrying the rest."""
+
+    def __init__(self, data, failed):
+        super().__init__(f"Could not fetch {', '.join(failed)}")
+        self.data = data
+        self.failed = failed
+
+async def _fetch_crypto_data(client, crypto_id, days, retries=3):
+    url = f'https://api.coingecko.com/api/v3/coins/{crypto_id}/market_chart'
+    params = {'vs_currency': 'usd', 'days': days}
+    for attempt in range(retries):
+        response = await client.get(url, params=params)
+        if response.status_code != 429 or attempt == retries - 1:
+            break
+        # Rate limited by CoinGecko's free tier; back off before retrying
+        try:
+            delay = float(response.headers.get('Retry-After', 2 ** attempt))
+        except ValueError:
+            delay = 2 ** attempt
+        await asyncio.sleep(min(delay, 10))
+    response.raise_for_status()
+    data = response.json()
+    prices = pd.DataFrame(data['prices'], columns=['Timestamp', 'Price'])
+    prices['Date'] = pd.to_datetime(prices['Timestamp'], unit='ms').dt.normalize()
+    daily_prices = prices.set_index('Date')[['Price']].resample('D').mean().reset_index()
+    return daily_prices
+
+async def _fetch_all_crypto_data(crypto_ids, days):
     try:
-        url = f'https://api.coingecko.com/api/v3/coins/{crypto_id}/market_chart'
-        params = {'vs_currency': 'usd', 'days': days}
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        prices = pd.DataFrame(data['prices'], columns=['Timestamp', 'Price'])
-        prices['Date'] = pd.to_datetime(prices['Timestamp'], unit='ms').dt.date
-        daily_prices = prices.groupby('Date').mean().reset_index()
-        return daily_prices
-    except:
-        return pd.DataFrame(columns=['Date', 'Price'])
+        # One HTTP/2 connection multiplexes all of the requests
+        client = httpx.AsyncClient(http2=True)
+    except ImportError:
+        # h2 is not installed; fall back to HTTP/1.1
+        client = httpx.AsyncClient()
+    async with client:
+        return await asyncio.gather(*[_fetch_crypto_data(client, crypto_id, days) for crypto_id in crypto_ids],
+                                    return_exceptions=True)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_all_crypto_data(crypto_ids, days='90'):
+    """Fetch daily prices for several cryptocurrencies concurrently.
+
+    Raises CryptoFetchError if any coin failed, so a partial result is never
+    cached; the coins that did succeed are available on the exception.
+    """
+    results = asyncio.run(_fetch_all_crypto_data(crypto_ids, days))
+    data = {crypto_id: df for crypto_id, df in zip(crypto_ids, results) if not isinstance(df, Exception)}
+    failed = [crypto_id for crypto_id in crypto_ids if crypto_id not in data]
+    if failed:
+        raise CryptoFetchError(data, failed)
+    return data
 
+@st.cache_data(ttl=3600, show_spinner=False)
 def fetch_stock_data(ticker, start, end):
-    try:
-        stock = yf.download(ticker, start=start, end=end)
-        stock = stock[['Close']].reset_index()
-        stock.columns = ['Date', 'Price']
-        stock['Date'] = pd.to_datetime(stock['Date']).dt.date
-        return stock
-    except:
-        return pd.DataFrame(columns=['Date', 'Price'])
+    """Fetch daily closes for a ticker, raising on failure so it is not cached."""
+    stock = yf.download(ticker, start=start, end=end)
+    if stock.empty:
+        # yfinance reports failed downloads as an empty frame rather than raising
+        raise ValueError(f"No data returned for {ticker}")
+    stock = stock[['Close']].reset_index()
+    stock.columns = ['Date', 'Price']
+    stock['Date'] = pd.to_datetime(stock['Date']).dt.normalize()
+    return stock
 
 def calculate_returns(df):
-    df = df.copy()
-    df['Return'] = df['Price'].pct_change()
-    return df
+    prices = df['Price'].to_numpy(dtype=np.float64)
+    returns = np.full_like(prices, np.nan)
+    returns[1:] = prices[1:] / prices[:-1] - 1.0
+    return df.assign(Return=returns)
 
 def calculate_volatility(df):
-    return df['Return'].std() * (252 ** 0.5) if not df['Return'].isnull().all() else 0.0
+    returns = df['Return'].to_numpy(dtype=np.float64)
+    returns = returns[~np.isnan(returns)]
+    return returns.std(ddof=1) * SQRT252 if returns.size else 0.0
 
+@njit(cache=True, nogil=True)
+def _ols_forecast(y, horizon):
+    """Fit a least-squares line to y over its index and extend it horizon steps."""
+    n = y.size
+    x = np.arange(n).astype(np.float64)
+    x_mean = x.mean()
+    y_mean = y.mean()
+    slope = ((x - x_mean) * (y - y_mean)).sum() / ((x - x_mean) ** 2).sum()
+    intercept = y_mean - slope * x_mean
+    future_x = np.arange(n, n + horizon).astype(np.float64)
+    return intercept + slope * future_x
+
+@st.cache_data(ttl=3600, show_spinner=False)
 def linear_regression_forecast(df, days=10):
     df = df.dropna()
     if len(df) < 2:
         return pd.DataFrame(columns=['Date', 'Predicted Price'])
-    df['Days'] = np.arange(len(df))
-    X = df[['Days']]
-    y = df['Price']
-    model = LinearRegression().fit(X, y)
-    future_days = np.arange(len(df), len(df) + days).reshape(-1, 1)
-    preds = model.predict(future_days)
+    preds = _ols_forecast(df['Price'].to_numpy(dtype=np.float64), days)
     future_dates = pd.date_range(start=pd.to_datetime(df['Date'].iloc[-1]) + pd.Timedelta(days=1), periods=days)
     return pd.DataFrame({'Date': future_dates, 'Predicted Price': preds})
 
+def rolling_volatility(df, window=7):
+    """Annualized rolling volatility of each column."""
+    return df.rolling(window=window).std() * SQRT252
+
+def analyze_asset(df):
+    """Compute returns, volatility and a price forecast for one asset."""
+    df = calculate_returns(df)
+    return df, calculate_volatility(df), linear_regression_forecast(df)
+
+@st.cache_resource
+def get_analysis_pool():
+    """Worker pool shared across reruns for the per-asset analytics."""
+    # The NumPy and Numba kernels release the GIL, and unlike a process pool
+    # threads need not pickle functions defined in Streamlit's __main__ script
+    return ThreadPoolExecutor(max_workers=os.cpu_count())
+
 # -------------------------------------------
 # Streamlit UI
 # -------------------------------------------
 
-logging.info('Starting Streamlit application')
+# Only build the UI inside the Streamlit runtime; a plain `python script.py`
+# just relaunches itself through `streamlit run` below
+if is_streamlit_running():
+    logging.info('Starting Streamlit application')
 
-try:
-    st.set_page_config(layout="wide")
-    logging.info('Page config set')
-    
-    st.title("📊 Crypto vs. Stock Market Analysis (Enhanced)")
-    logging.info('Title set')
+    try:
+        st.set_page_config(layout="wide")
+        logging.info('Page config set')
 
-    # Sidebar Inputs
-    st.sidebar.header("Input Settings")
-    cryptos = st.sidebar.multiselect("Choose Cryptocurrencies", ['bitcoin', 'ethereum', 'litecoin'], default=['bitcoin'])
-    stocks = st.sidebar.multiselect("Choose Stock Tickers", ['SPY', 'AAPL', 'GOOGL'], default=['SPY'])
-    days = st.sidebar.slider("Days of Data", 30, 365, 90)
-    start_date = datetime.date.today() - datetime.timedelta(days=days)
-    end_date = datetime.date.today()
-    logging.info('Sidebar inputs set up')
+        st.title("📊 Crypto vs. Stock Market Analysis (Enhanced)")
+        logging.info('Title set')
 
-except Exception as e:
-    st.error(f"An error occurred during app initialization: {str(e)}")
-    logging.error(f"Error during initialization: {str(e)}")
-    st.stop()
+        # Sidebar Inputs
+        st.sidebar.header("Input Settings")
+        cryptos = st.sidebar.multiselect("Choose Cryptocurrencies", ['bitcoin', 'ethereum', 'litecoin'], default=['bitcoin'])
+        stocks = st.sidebar.multiselect("Choose Stock Tickers", ['SPY', 'AAPL', 'GOOGL'], default=['SPY'])
+        days = st.sidebar.slider("Days of Data", 30, 365, 90)
+        start_date = datetime.date.today() - datetime.timedelta(days=days)
+        end_date = datetime.date.today()
+        logging.info('Sidebar inputs set up')
 
+    except Exception as e:
+        st.error(f"An error occurred during app initialization: {str(e)}")
+        logging.error(f"Error during initialization: {str(e)}")
+        st.stop()
 
 
-try:
-    # Display Data and Stats
-    st.subheader("📈 Price & Performance")
-    logging.info('Starting data display section')
 
-    col1, col2 = st.columns(2)
-    combined_series = []
+    try:
+        # Display Data and Stats
+        st.subheader("📈 Price & Performance")
+        logging.info('Starting data display section')
 
-    # CRYPTO
-    for crypto in cryptos:
-        try:
-            logging.info(f'Fetching data for {crypto}')
-            df = fetch_crypto_data(crypto, str(days))
-            if df.empty:
-                st.warning(f"No data found for {crypto}")
-                continue
-            
-            df = calculate_returns(df)
-            combined_series.append(pd.Series(df['Return'].values, index=df['Date'], name=f'{crypto}_return'))
-
-            with col1:
-                st.plotly_chart(px.line(df, x='Date', y='Price', title=f'{crypto.capitalize()} Price'), use_container_width=True)
-            with col2:
-                st.metric(f"{crypto.capitalize()} Volatility", f"{calculate_volatility(df):.2%}")
-                st.metric(f"{crypto.capitalize()} Return", f"{df['Return'].sum():.2%}")
-                if st.checkbox(f"Show {crypto.capitalize()} Forecast"):
-                    forecast_df = linear_regression_forecast(df)
-                    st.plotly_chart(px.line(forecast_df, x='Date', y='Predicted Price', title=f'{crypto.capitalize()} Forecast'), use_container_width=True)
-            logging.info(f'Successfully processed {crypto} data')
-            
-        except Exception as e:
-            st.error(f"Error processing {crypto}: {str(e)}")
-            logging.error(f"Error processing {crypto}: {str(e)}")
-            continue
+        col1, col2 = st.columns(2)
+        combined_series = []
 
-    # STOCKS
-    for stock in stocks:
+        # Fetch every asset, then run the per-asset analytics side by side
+        logging.info(f'Fetching data for {", ".join(cryptos)}')
         try:
+            crypto_data = fetch_all_crypto_data(tuple(cryptos), str(days))
+        except CryptoFetchError as e:
+            logging.error(f"Error fetching crypto data: {str(e)}")
+            crypto_data = e.data
+        except Exception as e:
+            logging.error(f"Error fetching crypto data: {str(e)}")
+            crypto_data = {}
+        stock_data = {}
+        for stock in stocks:
             logging.info(f'Fetching data for {stock}')
-            df = fetch_stock_data(stock, start=start_date, end=end_date)
-            if df.empty:
-                st.warning(f"No data found for {stock}")
+            try:
+                stock_data[stock] = fetch_stock_data(stock, start=start_date, end=end_date)
+            except Exception as e:
+                logging.error(f"Error fetching {stock}: {str(e)}")
+
+        pool = get_analysis_pool()
+        crypto_analysis = {crypto: pool.submit(analyze_asset, df) for crypto, df in crypto_data.items()}
+        stock_analysis = {stock: pool.submit(analyze_asset, df) for stock, df in stock_data.items()}
+
+        # CRYPTO
+        for crypto in cryptos:
+            try:
+                if crypto not in crypto_analysis:
+                    st.warning(f"No data found for {crypto}")
+                    continue
+
+                df, volatility, forecast_df = crypto_analysis[crypto].result()
+                combined_series.append(pd.Series(df['Return'].values, index=df['Date'], name=f'{crypto}_return'))
+
+                with col1:
+                    st.plotly_chart(px.line(df, x='Date', y='Price', title=f'{crypto.capitalize()} Price'), use_container_width=True)
+                with col2:
+                    st.metric(f"{crypto.capitalize()} Volatility", f"{volatility:.2%}")
+                    st.metric(f"{crypto.capitalize()} Return", f"{df['Return'].sum():.2%}")
+                    if st.checkbox(f"Show {crypto.capitalize()} Forecast"):
+                        st.plotly_chart(px.line(forecast_df, x='Date', y='Predicted Price', title=f'{crypto.capitalize()} Forecast'), use_container_width=True)
+                logging.info(f'Successfully processed {crypto} data')
+
+            except Exception as e:
+                st.error(f"Error processing {crypto}: {str(e)}")
+                logging.error(f"Error processing {crypto}: {str(e)}")
                 continue
-            
-            df = calculate_returns(df)
-            combined_series.append(pd.Series(df['Return'].values, index=df['Date'], name=f'{stock}_return'))
-
-            with col1:
-                st.plotly_chart(px.line(df, x='Date', y='Price', title=f'{stock.upper()} Price'), use_container_width=True)
-            with col2:
-                st.metric(f"{stock.upper()} Volatility", f"{calculate_volatility(df):.2%}")
-                st.metric(f"{stock.upper()} Return", f"{df['Return'].sum():.2%}")
-                if st.checkbox(f"Show {stock.upper()} Forecast"):
-                    forecast_df = linear_regression_forecast(df)
-                    st.plotly_chart(px.line(forecast_df, x='Date', y='Predicted Price', title=f'{stock.upper()} Forecast'), use_container_width=True)
-            logging.info(f'Successfully processed {stock} data')
-            
-        except Exception as e:
-            st.error(f"Error processing {stock}: {str(e)}")
-            logging.error(f"Error processing {stock}: {str(e)}")
-            continue
 
-except Exception as e:
-    st.error(f"An error occurred while displaying data: {str(e)}")
-    logging.error(f"Error in data display section: {str(e)}")
-    st.stop()
+        # STOCKS
+        for stock in stocks:
+            try:
+                if stock not in stock_analysis:
+                    st.warning(f"No data found for {stock}")
+                    continue
 
-try:
-    # -------------------------------------------
-    # Correlation & Volatility Heatmap
-    # -------------------------------------------
-    logging.info('Starting correlation and volatility analysis')
+                df, volatility, forecast_df = stock_analysis[stock].result()
+                combined_series.append(pd.Series(df['Return'].values, index=df['Date'], name=f'{stock}_return'))
 
-    st.subheader("🔁 Correlation Matrix & Volatility Heatmap")
+                with col1:
+                    st.plotly_chart(px.line(df, x='Date', y='Price', title=f'{stock.upper()} Price'), use_container_width=True)
+                with col2:
+                    st.metric(f"{stock.upper()} Volatility", f"{volatility:.2%}")
+                    st.metric(f"{stock.upper()} Return", f"{df['Return'].sum():.2%}")
+                    if st.checkbox(f"Show {stock.upper()} Forecast"):
+                        st.plotly_chart(px.line(forecast_df, x='Date', y='Predicted Price', title=f'{stock.upper()} Forecast'), use_container_width=True)
+                logging.info(f'Successfully processed {stock} data')
 
-    if combined_series:
-        try:
-            combined_df = pd.concat(combined_series, axis=1).dropna()
-
-            if not combined_df.empty:
-                corr = combined_df.corr()
-                fig_corr, ax_corr = plt.subplots()
-                sns.heatmap(corr, annot=True, cmap="coolwarm", ax=ax_corr)
-                st.pyplot(fig_corr)
-                logging.info('Correlation heatmap generated')
-
-                st.subheader("🔥 Rolling Volatility Heatmap")
-                rolling_vol = combined_df.rolling(window=7).std() * np.sqrt(252)
-                fig_vol, ax_vol = plt.subplots()
-                sns.heatmap(rolling_vol.T, cmap="YlGnBu", ax=ax_vol, cbar=True)
-                ax_vol.set_xlabel("Time")
-                ax_vol.set_ylabel("Assets")
-                st.pyplot(fig_vol)
-                logging.info('Volatility heatmap generated')
-            else:
-                st.info("Not enough overlapping data to display correlation or volatility heatmaps.")
-        except Exception as e:
-            st.error(f"Error generating heatmaps: {str(e)}")
-            logging.error(f"Error in heatmap generation: {str(e)}")
-    else:
-        st.info("No return data collected for correlation analysis.")
-
-    st.info('💡 You can run this app either by clicking Run in your IDE or using `streamlit run script.py` in your terminal.')
-    logging.info('Application completed successfully')
-
-except Exception as e:
-    st.error(f"An error occurred in the analysis section: {str(e)}")
-    logging.error(f"Error in analysis section: {str(e)}")
-    st.stop()
+            except Exception as e:
+                st.error(f"Error processing {stock}: {str(e)}")
+                logging.error(f"Error processing {stock}: {str(e)}")
+                continue
+
+    except Exception as e:
+        st.error(f"An error occurred while displaying data: {str(e)}")
+        logging.error(f"Error in data display section: {str(e)}")
+        st.stop()
+
+    try:
+        # -------------------------------------------
+        # Correlation & Volatility Heatmap
+        # -------------------------------------------
+        logging.info('Starting correlation and volatility analysis')
+
+        st.subheader("🔁 Correlation Matrix & Volatility Heatmap")
+
+        if combined_series:
+            try:
+                combined_df = pd.concat(combined_series, axis=1).dropna()
+
+                if not combined_df.empty:
+                    corr = combined_df.corr()
+                    fig_corr = px.imshow(corr, color_continuous_scale='RdBu_r', zmin=-1, zmax=1, text_auto='.2f')
+                    st.plotly_chart(fig_corr, use_container_width=True)
+                    logging.info('Correlation heatmap generated')
+
+                    st.subheader("🔥 Rolling Volatility Heatmap")
+                    rolling_vol = rolling_volatility(combined_df, window=7)
+                    fig_vol = px.imshow(rolling_vol.T, color_continuous_scale='YlGnBu', aspect='auto', labels={'x': 'Time', 'y': 'Assets'})
+                    st.plotly_chart(fig_vol, use_container_width=True)
+                    logging.info('Volatility heatmap generated')
+                else:
+                    st.info("Not enough overlapping data to display correlation or volatility heatmaps.")
+            except Exception as e:
+                st.error(f"Error generating heatmaps: {str(e)}")
+                logging.error(f"Error in heatmap generation: {str(e)}")
+        else:
+            st.info("No return data collected for correlation analysis.")
+
+        st.info('💡 You can run this app either by clicking Run in your IDE or using `streamlit run script.py` in your terminal.')
+        logging.info('Application completed successfully')
+
+    except Exception as e:
+        st.error(f"An error occurred in the analysis section: {str(e)}")
+        logging.error(f"Error in analysis section: {str(e)}")
+        st.stop()
 
 if __name__ == '__main__' and not is_streamlit_running():
     print("Starting Streamlit application...")